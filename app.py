@@ -1,15 +1,28 @@
+# Patch blocking stdlib I/O to cooperate with gevent before anything else is imported.
+from gevent import monkey
+monkey.patch_all()
+
+import hashlib
 import os
+import signal
+import sqlite3
 import subprocess
 import threading
+import time
 import json
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
+import requests
 
 from flask import (Flask, render_template, redirect, url_for, session, request,
-                   jsonify, abort, send_from_directory, flash)
+                   jsonify, abort, send_from_directory, flash, g, send_file, make_response)
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
 from werkzeug.utils import secure_filename
 from authlib.integrations.flask_client import OAuth
 
@@ -20,33 +33,87 @@ app = Flask(__name__)
 # Basic App Config
 app.secret_key = os.getenv('SECRET_KEY', 'default-fallback-secret-key-for-dev')
 app.config['SESSION_COOKIE_NAME'] = 'g_session'
+# When running behind the bundled Nginx config, let Nginx serve log files via X-Accel-Redirect.
+app.config['USE_X_ACCEL_REDIRECT'] = os.getenv('USE_X_ACCEL_REDIRECT', '0') == '1'
 
 # Base directory for all user-specific data (bots, logs, database)
 DATA_BASE_DIR = os.path.join(app.root_path, 'user_data')
 os.makedirs(DATA_BASE_DIR, exist_ok=True)
+LOG_DIR = os.path.join(DATA_BASE_DIR, 'logs')
+os.makedirs(LOG_DIR, exist_ok=True)
+# Each user's bot runs in its own virtualenv; wheels are cached once for every bot's pip install.
+VENV_DIR = os.path.join(DATA_BASE_DIR, 'venvs')
+PIP_CACHE_DIR = os.getenv('PIP_SHARED_CACHE_DIR', os.path.join(DATA_BASE_DIR, 'pip_cache'))
+os.makedirs(VENV_DIR, exist_ok=True)
+os.makedirs(PIP_CACHE_DIR, exist_ok=True)
 
 # Use SQLite for local file-based storage.
 # The database will be a single file named 'app.db' in the DATA_BASE_DIR.
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(DATA_BASE_DIR, 'app.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Keep a small pool of warm connections per worker instead of reconnecting on demand.
+# check_same_thread is disabled because a pooled connection may be checked out by a
+# different thread (or greenlet) than the one that opened it.
+# No pre-ping/recycle: a local SQLite file has no server-side sockets to go stale.
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_use_lifo': True,
+    # Short busy timeout: under gevent a blocked sqlite3 call stalls the whole worker, not one request.
+    'connect_args': {'check_same_thread': False, 'timeout': 5},
+}
+
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_conn, connection_record):
+    """Puts SQLite in WAL mode so readers are not blocked by a writer."""
+    if not isinstance(dbapi_conn, sqlite3.Connection):
+        return
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
 # Initialize extensions
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 oauth = OAuth(app)
 
-# Global dictionary to track running bot processes (keyed by user.id)
-# In production, a more persistent solution like Redis could be used.
-running_processes = {}
+# Interpreter used to create each bot's virtualenv.
+BOT_PYTHON = os.getenv('BOT_PYTHON', 'python3')
+# Bots used to run on BOT_PYTHON directly, so keep its installed packages importable from their venvs.
+VENV_OPTIONS = ['--system-site-packages']
+
+# Shared pool for bot orchestration work (starts, restarts) that should not block a request thread.
+# Each start holds a worker for its whole pip install, so the cap bounds concurrent installs per worker
+# process. Under gevent the workers are greenlets, so a generous cap costs little.
+app.config['BOT_EXECUTOR_WORKERS'] = int(os.getenv('BOT_EXECUTOR_WORKERS', '32'))
+executor = ThreadPoolExecutor(max_workers=app.config['BOT_EXECUTOR_WORKERS'], thread_name_prefix='bot-orchestrator')
 
 
 # --- Google OAuth Configuration ---
+GOOGLE_DISCOVERY_URL = 'https://accounts.google.com/.well-known/openid-configuration'
+
+def fetch_google_metadata():
+    """Fetches Google's OpenID discovery document once at startup. Returns None if unreachable."""
+    try:
+        resp = requests.get(GOOGLE_DISCOVERY_URL, timeout=5)
+        resp.raise_for_status()
+        return resp.json()
+    except (requests.RequestException, ValueError):
+        return None
+
+# Pin the prefetched metadata so /auth/login never waits on discovery; if Google was
+# unreachable at startup, fall back to letting Authlib discover it on first use.
+google_metadata = fetch_google_metadata()
 oauth.register(
     name='google',
     client_id=os.getenv('GOOGLE_CLIENT_ID'),
     client_secret=os.getenv('GOOGLE_CLIENT_SECRET'),
-    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-    client_kwargs={'scope': 'openid email profile'}
+    client_kwargs={'scope': 'openid email profile'},
+    **(google_metadata or {'server_metadata_url': GOOGLE_DISCOVERY_URL})
 )
 
 
@@ -57,29 +124,34 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     name = db.Column(db.String(100))
     picture = db.Column(db.String(255))
-    first_ip = db.Column(db.String(45), nullable=False)
+    first_ip = db.Column(db.String(45), unique=True, index=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     main_file = db.Column(db.String(255), default='app.py')
 
     def get_container_path(self):
-        """Returns the dedicated directory path for this user's files."""
-        path = os.path.join(DATA_BASE_DIR, 'files', str(self.id))
-        os.makedirs(path, exist_ok=True)
-        return path
+        """Returns the dedicated directory path for this user's files (created at login)."""
+        return os.path.join(DATA_BASE_DIR, 'files', str(self.id))
 
     def get_log_path(self):
         """Returns the path to the console log file for this user."""
-        log_dir = os.path.join(DATA_BASE_DIR, 'logs')
-        os.makedirs(log_dir, exist_ok=True)
-        return os.path.join(log_dir, f"{self.id}.log")
+        return os.path.join(LOG_DIR, f"{self.id}.log")
 
 
 # --- Helper Functions & Decorators ---
 def get_current_user():
-    """Retrieves the current user from the database based on the session."""
-    if 'user_id' in session:
-        return User.query.get(session['user_id'])
-    return None
+    """Retrieves the current user based on the session, cached on `g` for the request."""
+    if 'user_id' not in session:
+        return None
+    user = g.get('_current_user')
+    if user is None:
+        user = db.session.get(User, session['user_id'])
+        g._current_user = user
+    return user
+
+@app.teardown_request
+def clear_current_user(exc=None):
+    """Drops the cached user so it never outlives the request."""
+    g.pop('_current_user', None)
 
 def login_required(f):
     """Decorator to protect routes that require a logged-in user."""
@@ -118,26 +190,35 @@ def auth_callback():
     if not user_info:
         return redirect(url_for('login'))
 
-    user = User.query.filter_by(google_id=user_info['sub']).first()
-    client_ip = request.remote_addr
-
-    # Prevent multiple accounts from the same IP address.
-    existing_user_by_ip = User.query.filter_by(first_ip=client_ip).first()
-    if existing_user_by_ip and (not user or existing_user_by_ip.id != user.id):
+    # Lookup and (first-login) insert share one transaction, so the connection is checked out once.
+    try:
+        with db.session.begin():
+            user = db.session.execute(
+                select(User).where(User.google_id == user_info['sub'])
+            ).scalar_one_or_none()
+            if user is None:
+                user = User(
+                    google_id=user_info['sub'],
+                    email=user_info['email'],
+                    name=user_info['name'],
+                    picture=user_info['picture'],
+                    first_ip=request.remote_addr
+                )
+                db.session.add(user)
+                db.session.flush()
+            # Read these before commit expires the instance and forces a reload.
+            user_id = user.id
+            container_path = user.get_container_path()
+    except IntegrityError as e:
+        # Prevent multiple accounts from the same IP address (enforced by the unique first_ip index).
+        # Any other constraint violation is a real error, not a duplicate IP.
+        if 'first_ip' not in str(e.orig):
+            raise
         return "Error: An account has already been registered from this IP address.", 403
 
-    if user is None:
-        user = User(
-            google_id=user_info['sub'],
-            email=user_info['email'],
-            name=user_info['name'],
-            picture=user_info['picture'],
-            first_ip=client_ip
-        )
-        db.session.add(user)
-        db.session.commit()
-
-    session['user_id'] = user.id
+    # Create the user's container once per login so request handlers never have to.
+    os.makedirs(container_path, exist_ok=True)
+    session['user_id'] = user_id
     return redirect(url_for('dashboard'))
 
 
@@ -155,10 +236,13 @@ def files():
     container_path = user.get_container_path()
     file_list = []
     try:
-        if os.path.exists(container_path):
-            for item in sorted(os.listdir(container_path)):
-                is_dir = os.path.isdir(os.path.join(container_path, item))
-                file_list.append({'name': item, 'is_dir': is_dir})
+        # scandir reports the entry type from the directory listing itself, no stat per file.
+        with os.scandir(container_path) as entries:
+            for entry in entries:
+                file_list.append({'name': entry.name, 'is_dir': entry.is_dir(follow_symlinks=False)})
+        file_list.sort(key=lambda item: item['name'])
+    except FileNotFoundError:
+        pass
     except OSError:
         flash("Could not read files directory.", "error")
 
@@ -178,53 +262,269 @@ def profile():
     return render_template('profile.html', user=user)
 
 # --- API Routes for Bot Control ---
-def run_bot_process(command, user_id):
-    """Thread target to run the user's bot in a subprocess."""
-    log_path = User.query.get(user_id).get_log_path()
+class ProcRegistry:
+    """Tracks running bot processes keyed by user.id.
+
+    Liveness is cached: an entry exists exactly while the bot (or its pip install) is starting
+    or alive, and the SIGCHLD reaper removes it on exit, so "is it running?" never calls waitpid.
+    In production, a more persistent solution like Redis could be used.
+    """
+
+    def __init__(self):
+        # With threaded workers a Python signal handler runs on the main thread between bytecodes,
+        # possibly while that thread holds the lock, so it must be reentrant (reap() therefore
+        # tolerates half-updated maps). Under gevent the handler runs in the hub greenlet instead;
+        # no critical section below yields, so the lock is never held when it runs.
+        self._lock = threading.RLock()
+        self._procs = {}  # user_id -> (proc, pid, started_at); the bot, or pip while it installs
+        self._pids = {}  # pid -> user_id, so the reaper can find which process exited
+        self._starting = {}  # user_id -> cancelled flag, for start sequences that have not spawned the bot yet
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._procs.get(user_id)
+        return entry[0] if entry else None
+
+    def put(self, user_id, proc):
+        """Registers `proc` (the bot, or a helper such as pip) as the user's current process."""
+        with self._lock:
+            self._procs[user_id] = (proc, proc.pid, time.time())
+            self._pids[proc.pid] = user_id
+            # If the process already exited, its SIGCHLD arrived before it was registered.
+            if proc.poll() is not None:
+                self.pop(user_id)
+
+    def pop(self, user_id, proc=None):
+        """Unregisters the user's process; if `proc` is given, only when it is still the registered one."""
+        with self._lock:
+            entry = self._procs.get(user_id)
+            if not entry or (proc is not None and entry[0] is not proc):
+                return None
+            del self._procs[user_id]
+            self._pids.pop(entry[1], None)
+        return entry[0]
+
+    def is_running(self, user_id):
+        with self._lock:
+            return user_id in self._starting or user_id in self._procs
+
+    def mark_starting(self, user_id):
+        """Reserves the user's slot for a start sequence. Returns False if a bot is already running."""
+        with self._lock:
+            if self.is_running(user_id):
+                return False
+            self._starting[user_id] = False
+            return True
+
+    def cancel_start(self, user_id):
+        """Tells an in-progress start sequence not to launch the bot. Returns True if one was in progress."""
+        with self._lock:
+            if user_id not in self._starting:
+                return False
+            self._starting[user_id] = True
+            return True
+
+    def is_cancelled(self, user_id):
+        with self._lock:
+            return self._starting.get(user_id, False)
+
+    def finish_start(self, user_id, proc=None):
+        """Ends the start sequence, registering the bot `proc` unless Stop cancelled it meanwhile.
+
+        Returns False if the start was cancelled; the caller must then kill `proc` itself.
+        """
+        with self._lock:
+            cancelled = self._starting.pop(user_id, False)
+            if proc is not None and not cancelled:
+                self.put(user_id, proc)
+            return not cancelled
+
+    def reap(self, signum=None, frame=None):
+        """SIGCHLD handler: collects exited bot processes and drops them from the registry."""
+        with self._lock:
+            for pid, user_id in list(self._pids.items()):
+                entry = self._procs.get(user_id)
+                if entry is None or entry[1] != pid:
+                    continue # Interrupted mid-update; the interrupted call finishes the bookkeeping
+                if entry[0].poll() is not None:
+                    self._procs.pop(user_id, None)
+                    self._pids.pop(pid, None)
+
+
+bot_registry = ProcRegistry()
+
+
+def run_setup_command(user_id, args, cwd, log_file):
+    """Runs a start-up step (venv creation, pip) into the log. Returns its exit code.
+
+    The step runs in its own session and is registered like the bot itself, so Stop can kill it.
+    """
+    log_file.flush()
+    proc = subprocess.Popen(
+        args,
+        cwd=cwd,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+        start_new_session=True
+    )
+    bot_registry.put(user_id, proc)
     try:
-        with open(log_path, 'a') as log_file:
-            # Use os.setsid to create a new process group. This allows us to kill the entire group.
+        return proc.wait()
+    finally:
+        bot_registry.pop(user_id, proc)
+
+
+def ensure_venv(user_id, container_path, log_file):
+    """Returns the user's private virtualenv directory, creating it on first use (None if Stop cancelled it).
+
+    The .ready marker records the options the venv was built with; a venv built with other options
+    (such as one from before --system-site-packages) is rebuilt, and its requirements reinstalled.
+    """
+    venv_dir = os.path.join(VENV_DIR, str(user_id))
+    ready_path = os.path.join(venv_dir, '.ready')
+    try:
+        with open(ready_path) as f:
+            if f.read() == ' '.join(VENV_OPTIONS):
+                return venv_dir
+    except FileNotFoundError:
+        pass
+
+    log_file.write("--- Creating virtual environment ---\n")
+    # --clear discards a half-built or outdated venv, along with its requirements fingerprint.
+    if run_setup_command(user_id, [BOT_PYTHON, '-m', 'venv', '--clear', *VENV_OPTIONS, venv_dir],
+                         container_path, log_file) != 0:
+        if bot_registry.is_cancelled(user_id):
+            return None
+        raise RuntimeError("Could not create the bot's virtual environment.")
+    with open(ready_path, 'w') as f:
+        f.write(' '.join(VENV_OPTIONS))
+    return venv_dir
+
+
+def install_requirements(user_id, venv_dir, container_path, req_file_path, log_file):
+    """Installs requirements.txt into the user's venv, skipping pip if it is unchanged since the last success.
+
+    The fingerprint lives inside the venv, so it is only trusted for the environment it describes.
+    """
+    with open(req_file_path, 'rb') as f:
+        fingerprint = hashlib.sha256(f.read()).hexdigest()
+    sentinel_path = os.path.join(venv_dir, '.requirements.sha256')
+    try:
+        with open(sentinel_path) as f:
+            if f.read().strip() == fingerprint:
+                log_file.write("--- Requirements unchanged since last install, skipping pip ---\n")
+                return
+    except FileNotFoundError:
+        pass
+
+    log_file.write("--- Installing requirements from requirements.txt ---\n")
+    returncode = run_setup_command(
+        user_id,
+        [os.path.join(venv_dir, 'bin', 'python'), '-m', 'pip', 'install', '--no-input',
+         '--disable-pip-version-check', '--prefer-binary', '--cache-dir', PIP_CACHE_DIR,
+         '-r', req_file_path],
+        container_path,
+        log_file
+    )
+    if returncode == 0:
+        with open(sentinel_path, 'w') as f:
+            f.write(fingerprint)
+
+
+def start_bot(user_id, container_path, main_file, log_path):
+    """Executor task: installs requirements, then launches the user's bot as a detached subprocess.
+
+    The caller must have reserved the slot with bot_registry.mark_starting().
+    """
+    req_file_path = os.path.join(container_path, 'requirements.txt')
+    finished = False
+    try:
+        # Create the new log beside the old one and swap it in, so each run's log gets a fresh inode
+        # (bot_logs uses it to tell clients the log was replaced by a restart).
+        new_log_path = log_path + '.new'
+        with open(new_log_path, 'w') as log_file:
+            os.replace(new_log_path, log_path)
+            log_file.write(f"--- System is starting up at {time.ctime()} ---\n")
+            venv_dir = ensure_venv(user_id, container_path, log_file)
+            if venv_dir and os.path.isfile(req_file_path) and not bot_registry.is_cancelled(user_id):
+                install_requirements(user_id, venv_dir, container_path, req_file_path, log_file)
+            if bot_registry.is_cancelled(user_id):
+                log_file.write("--- Start cancelled ---\n")
+                return
+            bot_python = os.path.join(venv_dir, 'bin', 'python')
+            log_file.write(f"--- Starting bot: {bot_python} {main_file} ---\n")
+            log_file.flush()
+
+            # The bot writes straight to the log file, so it does not depend on this worker staying alive.
+            # start_new_session puts the bot in its own process group so we can kill the entire group.
             proc = subprocess.Popen(
-                ['/bin/sh', '-c', command],
+                [bot_python, '-u', main_file],
+                cwd=container_path,
                 stdout=log_file,
                 stderr=subprocess.STDOUT,
-                preexec_fn=os.setsid
+                start_new_session=True
             )
-            running_processes[user_id] = proc
-            proc.wait() # Wait for the process to complete
+        started = bot_registry.finish_start(user_id, proc)
+        finished = True
+        if not started:
+            # Stop arrived between the cancel check and the spawn.
+            kill_process_group(proc)
     except Exception as e:
         with open(log_path, 'a') as log_file:
             log_file.write(f"\n--- CRITICAL ERROR: Failed to start process ---\n{e}\n")
     finally:
-        running_processes.pop(user_id, None)
+        # Once finish_start has run, the slot may already belong to a newer start; leave it alone.
+        if not finished:
+            bot_registry.finish_start(user_id)
+
+
+def kill_process_group(proc):
+    """Terminates the process group started with start_new_session, escalating to SIGKILL."""
+    try:
+        os.killpg(os.getpgid(proc.pid), 15) # SIGTERM
+        proc.wait(timeout=5)
+    except (subprocess.TimeoutExpired, ProcessLookupError):
+        try:
+            os.killpg(os.getpgid(proc.pid), 9) # SIGKILL
+        except ProcessLookupError:
+            pass # Process already gone
+
+
+def stop_bot(user_id):
+    """Stops the user's bot, or cancels its start sequence (killing pip). Returns True if either was running."""
+    cancelled = bot_registry.cancel_start(user_id)
+    proc = bot_registry.get(user_id)
+    if proc is None:
+        return cancelled
+    kill_process_group(proc)
+    bot_registry.pop(user_id, proc)
+    return True
+
+
+def restart_bot(user_id, container_path, main_file, log_path):
+    """Executor task: stops the bot, waits for resources to free up, then starts it again."""
+    stop_bot(user_id)
+    time.sleep(1) # Give a moment for resources to free up
+    # A cancelled start sequence may still be unwinding; wait for it to release the slot.
+    deadline = time.monotonic() + 10
+    while not bot_registry.mark_starting(user_id):
+        if time.monotonic() > deadline:
+            with open(log_path, 'a') as log_file:
+                log_file.write("\n--- Restart skipped: another start is still in progress ---\n")
+            return
+        time.sleep(0.2)
+    start_bot(user_id, container_path, main_file, log_path)
 
 
 @app.route('/api/bot/start', methods=['POST'])
 @login_required
 def bot_start():
     user = get_current_user()
-    if user.id in running_processes and running_processes[user.id].poll() is None:
+    if not bot_registry.mark_starting(user.id):
         return jsonify({'status': 'error', 'message': 'Bot is already running.'}), 400
 
-    container_path = user.get_container_path()
-    req_file_path = os.path.join(container_path, 'requirements.txt')
-    log_path = user.get_log_path()
-
-    command = f"""
-    cd "{container_path}"
-    echo "--- System is starting up at $(date) ---" > "{log_path}"
-    if [ -f "{req_file_path}" ]; then
-        echo "--- Installing requirements from requirements.txt ---" >> "{log_path}"
-        pip install -r "{req_file_path}" >> "{log_path}" 2>&1
-    fi
-    echo "--- Starting bot: python3 {user.main_file} ---" >> "{log_path}"
-    exec python3 -u "{user.main_file}"
-    """
-
-    thread = threading.Thread(target=run_bot_process, args=(command, user.id))
-    thread.daemon = True
-    thread.start()
-
+    # Requirements install can take a while, so the whole start sequence runs on the executor.
+    executor.submit(start_bot, user.id, user.get_container_path(), user.main_file, user.get_log_path())
     return jsonify({'status': 'success', 'message': 'Bot start sequence initiated.'})
 
 
@@ -232,18 +532,7 @@ def bot_start():
 @login_required
 def bot_stop():
     user = get_current_user()
-    proc = running_processes.get(user.id)
-    if proc and proc.poll() is None:
-        try:
-            # Kill the entire process group started with os.setsid
-            os.killpg(os.getpgid(proc.pid), 15) # SIGTERM
-            proc.wait(timeout=5)
-        except (subprocess.TimeoutExpired, ProcessLookupError):
-            try:
-                os.killpg(os.getpgid(proc.pid), 9) # SIGKILL
-            except ProcessLookupError:
-                pass # Process already gone
-        running_processes.pop(user.id, None)
+    if stop_bot(user.id):
         return jsonify({'status': 'success', 'message': 'Bot stopped.'})
     return jsonify({'status': 'info', 'message': 'Bot was not running.'})
 
@@ -251,24 +540,46 @@ def bot_stop():
 @app.route('/api/bot/restart', methods=['POST'])
 @login_required
 def bot_restart():
-    bot_stop()
-    import time
-    time.sleep(1) # Give a moment for resources to free up
-    return bot_start()
+    user = get_current_user()
+    # The stop/sleep/start sequence runs on the shared executor so this worker thread is freed immediately.
+    executor.submit(restart_bot, user.id, user.get_container_path(), user.main_file, user.get_log_path())
+    return jsonify({'status': 'success', 'message': 'Bot restart sequence initiated.'}), 202
 
 
 @app.route('/api/bot/logs')
 @login_required
 def bot_logs():
+    """Serves the user's console log. Supports Range requests, so clients can fetch only the tail or new bytes."""
     user = get_current_user()
     log_path = user.get_log_path()
     try:
-        if os.path.exists(log_path):
-            with open(log_path, 'r') as f:
-                return f.read()
+        st = os.stat(log_path)
+    except FileNotFoundError:
         return "No logs found. Start your bot to generate logs."
-    except Exception as e:
-        return f"Error reading logs: {e}"
+    # Every start swaps in a new log file, so its inode identifies one run's log. Each response
+    # names it in X-Log-Generation; a client that sends back an older one is still holding byte
+    # offsets into another run, and is told to reset before reading. Plain GETs are served as usual.
+    generation = str(st.st_ino)
+    client_generation = request.headers.get('X-Log-Generation')
+    if client_generation and client_generation != generation:
+        response = make_response('', 205)
+        response.headers['X-Log-Generation'] = generation
+        response.cache_control.no_cache = True
+        return response
+    if app.config['USE_X_ACCEL_REDIRECT']:
+        # Hand the transfer to Nginx (see /internal_logs/ in nginx.conf) so this worker is freed at once.
+        # Nginx drops upstream headers on the internal redirect; that location re-adds X-Log-Generation.
+        response = make_response('')
+        response.headers['X-Accel-Redirect'] = f"/internal_logs/{os.path.basename(log_path)}"
+        response.headers['X-Log-Generation'] = generation
+        response.headers['Content-Type'] = 'text/plain; charset=utf-8'
+        response.cache_control.no_cache = True
+        return response
+    # conditional=True handles Range (206/416) and ETag revalidation (304); full responses go
+    # through wsgi.file_wrapper so gunicorn can sendfile() them straight from the page cache.
+    response = send_file(log_path, mimetype='text/plain; charset=utf-8', conditional=True, max_age=0)
+    response.headers['X-Log-Generation'] = generation
+    return response
 
 # Placeholder for future command injection into stdin
 @app.route('/api/bot/command', methods=['POST'])
@@ -277,5 +588,11 @@ def bot_command():
     return jsonify({'status': 'info', 'message': 'Direct command input is not yet implemented.'}), 501
 
 
+# Reap exited bots from a single SIGCHLD handler instead of one waiting thread per bot.
+# Signal handlers can only be installed from the main thread.
+if threading.current_thread() is threading.main_thread():
+    signal.signal(signal.SIGCHLD, bot_registry.reap)
+
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -9,8 +9,13 @@ bind = "0.0.0.0:8000"
 workers = multiprocessing.cpu_count() * 2 + 1
 
 # Worker class for handling requests
-worker_class = "gthread"
-threads = 2
+# Handlers mostly wait on I/O (Google OAuth, the database, log files), so gevent
+# lets each worker interleave many in-flight requests instead of 2 threads.
+# Note: sqlite3 calls are blocking C code that gevent cannot switch out of, so a write
+# waiting on a locked database stalls every greenlet in the worker until SQLite's busy
+# timeout expires. Keep that timeout short (see SQLALCHEMY_ENGINE_OPTIONS in app.py).
+worker_class = "gevent"
+worker_connections = 500
 
 # Timeout for workers
 timeout = 60
@@ -19,3 +24,32 @@ timeout = 60
 accesslog = "-"
 errorlog = "-"
 loglevel = "info"
+
+
+# Route worker logging through in-memory queues so request greenlets never block on
+# stdio writes. Each worker drains the queues on its own background listener threads.
+# Installed in post_worker_init rather than post_fork: the gevent worker monkey-patches
+# threading after post_fork, and listener threads started before that break at exit.
+_log_listeners = []  # (logger, listener) pairs whose listener has been started
+
+def post_worker_init(worker):
+    import logging
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
+
+    for name in ("gunicorn.error", "gunicorn.access", ""):
+        logger = logging.getLogger(name)
+        if not logger.handlers:
+            continue
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *logger.handlers, respect_handler_level=True)
+        listener.start()
+        logger.handlers = [QueueHandler(log_queue)]
+        _log_listeners.append((logger, listener))
+
+def worker_exit(server, worker):
+    # Flush anything still queued, then write straight to the original handlers again.
+    while _log_listeners:
+        logger, listener = _log_listeners.pop()
+        listener.stop()
+        logger.handlers = list(listener.handlers)
@@ -71,6 +71,9 @@ SECRET_KEY='$FLASK_SECRET_KEY'
 # Google OAuth Credentials
 GOOGLE_CLIENT_ID='$GOOGLE_CLIENT_ID'
 GOOGLE_CLIENT_SECRET='$GOOGLE_CLIENT_SECRET'
+
+# Serve bot logs through Nginx (see /internal_logs/ in nginx.conf)
+USE_X_ACCEL_REDIRECT='1'
 EOF
 echo "✅ .env file created."
 
@@ -106,6 +109,7 @@ deactivate
 print_header "Configuring Nginx and Systemd Service"
 # Nginx
 sed -i "s/YOUR_DOMAIN_OR_IP/$DOMAIN_NAME/g" nginx.conf
+sed -i "s|/var/www/bothost|$PROJECT_DIR|g" nginx.conf
 cp nginx.conf /etc/nginx/sites-available/bothost
 ln -sfn /etc/nginx/sites-available/bothost /etc/nginx/sites-enabled/
 rm -f /etc/nginx/sites-enabled/default